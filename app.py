@@ -1,16 +1,34 @@
 # app.py
+import functools
+import os
+import pickle
 import re
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Set
 
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+try:
+    # numba: compila il kernel di punteggio, se disponibile
+    from numba import njit
+except ImportError:
+    njit = None
+from bs4 import BeautifulSoup, SoupStrainer
 import streamlit as st
 
 BASE = "https://www.cantineocatecumenale.it"
 START_URL = f"{BASE}/lista-canti/"
 
+# Copia su disco dell'indice dei canti (sopravvive ai riavvii del server)
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "canti", "index.pkl")
+CACHE_TTL = 6 * 60 * 60   # secondi
+_CACHE_FORMAT = 4         # da incrementare quando cambiano Song/Ref
+
 # ----------------------------
 # Parsing & normalization
 # ----------------------------
@@ -79,34 +97,58 @@ BOOK_SHORT = {
     "ap": "ap",
 }
 
-@dataclass(frozen=True)
+# Codice intero di ogni libro: confronti tra interi nel punteggio e nelle colonne NumPy
+_BOOK_CODE = {k: i for i, k in enumerate(sorted(set(BOOK_ALIASES.values()) | set(BOOK_SHORT.values())))}
+
+# Pattern precompilati una volta sola (hot path del parsing)
+_BOOK_TRANS = str.maketrans({".": None, "’": "'"})
+# parole da togliere attorno al nome del libro, in un solo passaggio
+_RE_BOOK_NOISE = re.compile(r"\b(?:capitolo|vv?)\b|lettera a(?:gl)?i |vangelo di ")
+_RE_ROMAN_CORINZI = re.compile(r"^(ii?)\s+corinzi$")
+
+# Un solo pattern con due alternative, così il testo viene scandito una volta:
+#   abbrev:     "Is 12,4-6" / "Rm 8,15-17" / "Gv 8,31-36" / "Sal 65" / "1 Cor 15"
+#   discursive: "isaia dal capitolo 30 vv 15 e 16"
+# Il nome del libro nello stile discorsivo è limitato a 30 caratteri, così
+# niente backtracking incontrollato. I versi discorsivi sono al più "15",
+# "15-16" o "15 e 16": con un pattern più largo la scansione unica si
+# mangerebbe l'"1"/"2" del riferimento dopo ("... vv 15 e 16 1 Cor 15,3").
+_REF_PATT = re.compile(
+    r"(?i)"
+    r"(?P<abbrev>\b(?P<book>(?:[12]\s*)?[A-Za-zÀ-ÖØ-öø-ÿ\.]{1,10})\s+"
+    r"(?P<chap>\d{1,3})"
+    r"(?:\s*,\s*(?P<verses>[\d\-–]+|[\d]+(?:\s*e\s*[\d]+)?|ss))?)"
+    r"|(?P<discursive>\b(?P<bookname>[A-Za-zÀ-ÖØ-öø-ÿ\s]{1,30}?)\s+dal\s+capitolo\s+(?P<dchap>\d{1,3})"
+    r"(?:\s+v{1,2}\s+(?P<vtext>\d+(?:\s*(?:[\-–]|e)\s*\d+)?))?)"
+)
+
+@dataclass(frozen=True, slots=True)
 class Ref:
     book: str                 # canonical key (e.g., "is", "rm", "gv")
+    book_code: int            # _BOOK_CODE[book]
     chapter: Optional[int]    # None if unknown
     v1: Optional[int]         # start verse
     v2: Optional[int]         # end verse
     raw: str                  # original snippet
 
-@dataclass
+@dataclass(slots=True)
 class Song:
     title: str
     url: str
-    refs: List[Ref]
+    refs: Tuple[Ref, ...]
     cfr_raw: str
 
 def _clean(s: str) -> str:
-    return re.sub(r"\s+", " ", s.strip())
+    return " ".join(s.split())
 
 def normalize_book(token: str) -> Optional[str]:
-    t = _clean(token).lower()
-    t = t.replace(".", "").replace("’", "'")
-    t = re.sub(r"\bcapitolo\b", "", t).strip()
-    t = re.sub(r"\bvv?\b", "", t).strip()
-    t = t.replace("lettera ai ", "").replace("lettera agli ", "").replace("vangelo di ", "")
+    t = _clean(token).lower().translate(_BOOK_TRANS)
+    t = _RE_BOOK_NOISE.sub("", t).strip()
 
-    # gestisci "1 corinzi", "2 corinzi"
-    t = re.sub(r"^i\s+corinzi$", "1 corinzi", t)
-    t = re.sub(r"^ii\s+corinzi$", "2 corinzi", t)
+    # gestisci "i corinzi", "ii corinzi" -> "1 corinzi", "2 corinzi"
+    m = _RE_ROMAN_CORINZI.match(t)
+    if m:
+        t = f"{len(m.group(1))} corinzi"
 
     if t in BOOK_ALIASES:
         return BOOK_ALIASES[t]
@@ -114,9 +156,32 @@ def normalize_book(token: str) -> Optional[str]:
         return BOOK_SHORT[t]
     return None
 
-def parse_reference_flexible(text: str) -> List[Ref]:
+def _verse_num(s: str) -> Optional[int]:
+    """Numero di versetto, al più 3 cifre come i capitoli (Sal 119 ne ha 176); altrimenti None."""
+    return int(s) if s.isdigit() and len(s) <= 3 else None
+
+def _parse_verses(verses: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Interpreta la parte dei versi: "15-16", "15–16", "15 e 16", "15"; 'ss' o altro -> ignoti."""
+    if not verses or verses == "ss":
+        return None, None
+    # "15"
+    v = _verse_num(verses)
+    if v is not None:
+        return v, v
+    # "15-16", "15–16", "15 e 16"
+    for sep in ("-", "–", "e"):
+        i = verses.find(sep)
+        if i >= 0:
+            v1, v2 = _verse_num(verses[:i].strip()), _verse_num(verses[i + 1:].strip())
+            if v1 is not None and v2 is not None:
+                return v1, v2
+    return None, None
+
+@functools.lru_cache(maxsize=4096)
+def parse_reference_flexible(text: str) -> Tuple[Ref, ...]:
     """
     Estrae uno o più riferimenti da testo libero.
+    Memoizzata: le stesse righe "Cfr." ricorrono in molti canti.
     Supporta:
       - "IS 01, 15-16"
       - "Isaia dal capitolo 30 vv 15 e 16"
@@ -126,75 +191,32 @@ def parse_reference_flexible(text: str) -> List[Ref]:
       - gestisce 'ss' come versi ignoti
     """
     t = _clean(text)
-    t_low = t.lower()
 
     refs: List[Ref] = []
 
-    # 1) pattern stile abbreviato: "Is 12,4-6" / "Rm 8,15-17" / "Gv 8,31-36" / "Sal 65"
-    # Consente anche "1 Cor 15" ecc.
-    patt1 = re.compile(
-        r"\b(?P<book>(?:[12]\s*)?[A-Za-zÀ-ÖØ-öø-ÿ\.]{1,10})\s+"
-        r"(?P<chap>\d{1,3})"
-        r"(?:\s*,\s*(?P<verses>[\d\-–]+|[\d]+(?:\s*e\s*[\d]+)?|ss))?",
-        re.IGNORECASE
-    )
-    for m in patt1.finditer(t):
-        book_raw = _clean(m.group("book"))
-        book_key = normalize_book(book_raw.lower().replace(" ", ""))
-        if not book_key:
-            book_key = normalize_book(book_raw)
-        if not book_key:
-            continue
+    for m in _REF_PATT.finditer(t):
+        if m.group("abbrev") is not None:
+            book_raw = _clean(m.group("book"))
+            book_key = normalize_book(book_raw.lower().replace(" ", ""))
+            if not book_key:
+                book_key = normalize_book(book_raw)
+            if not book_key:
+                continue
+            chap = int(m.group("chap"))
+            verses = m.group("verses")
+            if verses:
+                verses = verses.strip().lower()
+        else:
+            book_key = normalize_book(_clean(m.group("bookname")))
+            if not book_key:
+                continue
+            chap = int(m.group("dchap"))
+            verses = m.group("vtext")
+            if verses:
+                verses = _clean(verses).lower()
 
-        chap = int(m.group("chap"))
-        verses = m.group("verses")
-        v1 = v2 = None
-        if verses:
-            verses = verses.strip().lower()
-            if verses == "ss":
-                v1 = v2 = None
-            else:
-                # "15-16" or "15–16"
-                if re.match(r"^\d+\s*[\-–]\s*\d+$", verses):
-                    a, b = re.split(r"[\-–]", verses)
-                    v1, v2 = int(a.strip()), int(b.strip())
-                # "15 e 16"
-                elif re.match(r"^\d+\s*e\s*\d+$", verses):
-                    a, b = re.split(r"e", verses)
-                    v1, v2 = int(a.strip()), int(b.strip())
-                # "15"
-                elif re.match(r"^\d+$", verses):
-                    v1 = v2 = int(verses)
-        refs.append(Ref(book=book_key, chapter=chap, v1=v1, v2=v2, raw=m.group(0)))
-
-    # 2) pattern discorsivo: "isaia dal capitolo 30 vv 15 e 16"
-    patt2 = re.compile(
-        r"\b(?P<bookname>[A-Za-zÀ-ÖØ-öø-ÿ\s]+?)\s+dal\s+capitolo\s+(?P<chap>\d{1,3})"
-        r"(?:\s+v{1,2}\s+(?P<vtext>[\d\s\-–e]+))?",
-        re.IGNORECASE
-    )
-    for m in patt2.finditer(t_low):
-        bookname = _clean(m.group("bookname"))
-        book_key = normalize_book(bookname)
-        if not book_key:
-            continue
-        chap = int(m.group("chap"))
-        vtext = m.group("vtext")
-        v1 = v2 = None
-        if vtext:
-            vtext = _clean(vtext)
-            # prova "15-16"
-            if re.match(r"^\d+\s*[\-–]\s*\d+$", vtext):
-                a, b = re.split(r"[\-–]", vtext)
-                v1, v2 = int(a.strip()), int(b.strip())
-            # "15 e 16"
-            elif re.match(r"^\d+\s*e\s*\d+$", vtext):
-                a, b = re.split(r"e", vtext)
-                v1, v2 = int(a.strip()), int(b.strip())
-            # "15"
-            elif re.match(r"^\d+$", vtext):
-                v1 = v2 = int(vtext)
-        refs.append(Ref(book=book_key, chapter=chap, v1=v1, v2=v2, raw=m.group(0)))
+        v1, v2 = _parse_verses(verses)
+        refs.append(Ref(book=book_key, book_code=_BOOK_CODE[book_key], chapter=chap, v1=v1, v2=v2, raw=m.group(0)))
 
     # dedup grezzo
     uniq = []
@@ -204,129 +226,365 @@ def parse_reference_flexible(text: str) -> List[Ref]:
         if key not in seen:
             seen.add(key)
             uniq.append(r)
-    return uniq
-
-def verse_overlap(a: Ref, b: Ref) -> float:
-    """Ritorna overlap tra intervalli di versi (0..1). Se versi ignoti -> 0.3 se libro+capitolo match."""
-    if a.book != b.book:
-        return 0.0
-    if a.chapter is None or b.chapter is None:
-        return 0.0
-    if a.chapter != b.chapter:
-        return 0.0
-    # se non ho versi, ma ho capitolo: match debole
-    if a.v1 is None or b.v1 is None:
-        return 0.30
-    a1, a2 = a.v1, (a.v2 if a.v2 is not None else a.v1)
-    b1, b2 = b.v1, (b.v2 if b.v2 is not None else b.v1)
-    inter = max(0, min(a2, b2) - max(a1, b1) + 1)
-    union = max(a2, b2) - min(a1, b1) + 1
-    return inter / union if union else 0.0
-
-def score_song_for_reading(reading_refs: List[Ref], song: Song) -> float:
+    return tuple(uniq)
+
+@dataclass(frozen=True, slots=True)
+class SongIndex:
+    """Riferimenti di tutti i canti in colonne NumPy: una riga per Ref, raggruppate per canto."""
+    book: np.ndarray      # int16, codice libro (_BOOK_CODE)
+    chap: np.ndarray      # int32, -1 se capitolo ignoto
+    v1: np.ndarray        # int32, -1 se versi ignoti
+    v2: np.ndarray        # int32, = v1 se manca la fine dell'intervallo
+    song: np.ndarray      # int32, indice del canto in songs (non decrescente)
+    starts: np.ndarray    # prima riga di ogni canto con riferimenti (per reduceat)
+    n_songs: int
+
+def build_index(songs: List[Song]) -> SongIndex:
+    rows = [
+        (
+            r.book_code,
+            -1 if r.chapter is None else r.chapter,
+            -1 if r.v1 is None else r.v1,
+            -1 if r.v1 is None else (r.v2 if r.v2 is not None else r.v1),
+            i,
+        )
+        for i, s in enumerate(songs)
+        for r in s.refs
+    ]
+    cols = list(zip(*rows)) if rows else [(), (), (), (), ()]
+    song = np.array(cols[4], dtype=np.int32)
+    return SongIndex(
+        book=np.array(cols[0], dtype=np.int16),
+        chap=np.array(cols[1], dtype=np.int32),
+        v1=np.array(cols[2], dtype=np.int32),
+        v2=np.array(cols[3], dtype=np.int32),
+        song=song,
+        starts=np.flatnonzero(np.diff(song, prepend=-1)),
+        n_songs=len(songs),
+    )
+
+def _score_refs_kernel(books, chaps, v1s, v2s, song_of, rr_line, rr_book, rr_chap, rr_v1, rr_v2, out):
     """
-    Scoring:
-      - match libro+capitolo+versi: fino a 1.0 (max overlap)
+    Un solo passaggio sulle righe dell'indice per tutti i riferimenti di lettura
+    rr_* (-1 = ignoto), di tutte le letture: per ogni canto somma a
+    out[rr_line, canto] il punteggio del suo miglior riferimento per ciascuno.
+    Compilato con numba quando disponibile (vedi _get_score_kernel).
+    """
+    n = len(books)
+    m = len(rr_book)
+    best = np.zeros(m)
+    i = 0
+    while i < n:
+        s = song_of[i]
+        best[:] = 0.0
+        while i < n and song_of[i] == s:
+            for j in range(m):
+                # overlap pieno (1.0) già trovato: le altre righe del canto non possono superarlo
+                if best[j] >= 1.0 or books[i] != rr_book[j]:
+                    continue
+                if rr_chap[j] < 0:
+                    sc = 0.10
+                elif chaps[i] == rr_chap[j]:
+                    if rr_v1[j] < 0 or v1s[i] < 0:
+                        sc = 0.30
+                    else:
+                        inter = max(0, min(rr_v2[j], v2s[i]) - max(rr_v1[j], v1s[i]) + 1)
+                        union = max(rr_v2[j], v2s[i]) - min(rr_v1[j], v1s[i]) + 1
+                        sc = inter / union if union != 0 else 0.0
+                else:
+                    sc = 0.10  # stesso libro, altro capitolo
+                if sc > best[j]:
+                    best[j] = sc
+            i += 1
+        for j in range(m):
+            out[rr_line[j], s] += best[j]
+
+@st.cache_resource(show_spinner=False)
+def _get_score_kernel():
+    """_score_refs_kernel compilato da numba, una volta per processo; None se numba non c'è."""
+    return njit(cache=True)(_score_refs_kernel) if njit else None
+
+def _score_ref_numpy(rr: Ref, index: SongIndex, out: np.ndarray) -> None:
+    """Punteggio di un riferimento di lettura con maschere NumPy (se numba non c'è); somma in out[canto]."""
+    same_book = index.book == rr.book_code
+    if rr.chapter is None:
+        per_ref = np.where(same_book, 0.10, 0.0)
+    else:
+        if rr.v1 is None:
+            overlap = 0.30
+        else:
+            a1, a2 = rr.v1, (rr.v2 if rr.v2 is not None else rr.v1)
+            inter = np.maximum(0, np.minimum(a2, index.v2) - np.maximum(a1, index.v1) + 1)
+            union = np.maximum(a2, index.v2) - np.minimum(a1, index.v1) + 1
+            overlap = np.where(union != 0, inter / np.where(union != 0, union, 1), 0.0)
+            # versi ignoti nel canto: match debole sul capitolo
+            overlap = np.where(index.v1 < 0, 0.30, overlap)
+        same_chap = same_book & (index.chap == rr.chapter)
+        per_ref = np.where(same_chap, overlap, np.where(same_book, 0.10, 0.0))
+    # miglior riferimento di ogni canto per questa lettura
+    out[index.song[index.starts]] += np.maximum.reduceat(per_ref, index.starts)
+
+def score_songs_for_readings(refs_per_line: List[Tuple[Ref, ...]], index: SongIndex) -> np.ndarray:
+    """
+    Punteggio di ogni canto per ogni lettura, calcolato sulle colonne di SongIndex
+    (le righe dell'indice vengono lette una volta sola). Per ogni riferimento della
+    lettura conta il miglior riferimento del canto:
+      - match libro+capitolo+versi: fino a 1.0 (overlap tra intervalli di versi)
       - match libro+capitolo senza versi: 0.30
       - match solo libro: 0.10
       - più riferimenti matching -> somma con cap a 2.5
+    Ritorna una matrice letture × canti.
     """
-    if not reading_refs:
-        return 0.0
-
-    score = 0.0
-    for rr in reading_refs:
-        best = 0.0
-        for sr in song.refs:
-            if rr.book != sr.book:
-                continue
-            if rr.chapter is None or sr.chapter is None:
-                best = max(best, 0.10)
-            elif rr.chapter == sr.chapter:
-                best = max(best, verse_overlap(rr, sr))
-            else:
-                best = max(best, 0.10)  # stesso libro, altro capitolo
-        score += best
-    return min(score, 2.5)
+    total = np.zeros((len(refs_per_line), index.n_songs))
+    if not len(index.song):
+        return total
+    kernel = _get_score_kernel()
+    if kernel is None:
+        for line, reading_refs in enumerate(refs_per_line):
+            for rr in reading_refs:
+                _score_ref_numpy(rr, index, total[line])
+        return np.minimum(total, 2.5)
+
+    flat = [(line, rr) for line, reading_refs in enumerate(refs_per_line) for rr in reading_refs]
+    v1 = [-1 if rr.v1 is None else rr.v1 for _, rr in flat]
+    kernel(
+        index.book, index.chap, index.v1, index.v2, index.song,
+        np.array([line for line, _ in flat], dtype=np.int32),
+        np.array([rr.book_code for _, rr in flat], dtype=np.int16),
+        np.array([-1 if rr.chapter is None else rr.chapter for _, rr in flat], dtype=np.int32),
+        np.array(v1, dtype=np.int32),
+        np.array([v if rr.v2 is None else rr.v2 for v, (_, rr) in zip(v1, flat)], dtype=np.int32),
+        total,
+    )
+    return np.minimum(total, 2.5)
 
 # ----------------------------
 # Scraping the site
 # ----------------------------
 
-@st.cache_data(ttl=6 * 60 * 60, show_spinner=False)
-def fetch_all_songs_from_lista_canti(max_pages: int = 80, polite_sleep: float = 0.25) -> List[Song]:
+_RE_PAGE_NUM = re.compile(r"/lista-canti/page/(\d+)/?")
+# Dalla pagina servono solo titoli, liste "Cfr." e link (canti e paginazione)
+_LISTA_STRAINER = SoupStrainer(["h1", "h2", "ul", "a"])
+
+class _TokenBucket:
+    """Limita il ritmo delle richieste (per cortesia verso il sito); condiviso tra i thread."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate              # richieste al secondo, a regime
+        self.capacity = capacity      # raffica massima
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _make_soup(r: requests.Response) -> BeautifulSoup:
+    # bytes a lxml: la codifica la ricava lui dal <meta charset>
+    return BeautifulSoup(r.content, "lxml", parse_only=_LISTA_STRAINER)
+
+def _parse_lista_page(soup: BeautifulSoup, seen: Set[Tuple[str, str]]) -> List[Song]:
     """
-    Scarica /lista-canti/ e tutte le pagine successive.
-    Estrae:
-      - titolo canto
-      - URL canto
-      - righe "Cfr. ..." (se presenti)
+    Estrae i canti (titolo, URL, riga "Cfr. ...") da una pagina della lista.
+    Un solo passaggio in ordine di documento su titoli e liste: ogni titolo
+    prende il primo <ul> che lo segue.
+    seen raccoglie (titolo minuscolo, url) dei canti già estratti, anche dalle
+    pagine precedenti: i doppioni vengono saltati.
     """
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0 (compatible; AuditBot/1.0; +https://example.invalid)"})
-
     songs: List[Song] = []
-    url = START_URL
-
-    for _ in range(max_pages):
-        r = session.get(url, timeout=30)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+    pending: List[Tuple[str, str]] = []   # (titolo, url) in attesa del loro <ul>
 
-        # blocchi: h1 con link (es. # A Te levo i miei occhi)
-        # poi un <ul><li> con "Cfr. ...", non sempre presente
-        for h in soup.find_all(["h1", "h2"]):
-            a = h.find("a", href=True)
+    # blocchi: h1 con link (es. # A Te levo i miei occhi)
+    # poi un <ul><li> con "Cfr. ...", non sempre presente
+    for el in soup.find_all(["h1", "h2", "ul"]):
+        if el.name != "ul":
+            a = el.find("a", href=True)
             if not a:
                 continue
             title = _clean(a.get_text(" ", strip=True))
             href = a["href"]
             if not href.startswith("http"):
                 href = BASE + href
+            # dedup per titolo+url
+            key = (title.lower(), href)
+            if key in seen:
+                continue
+            seen.add(key)
+            pending.append((title, href))
+            continue
+        if not pending:
+            continue
 
-            # prova a leggere i riferimenti dal primo <li> successivo
-            cfr_text = ""
-           # prova a leggere i riferimenti dal primo <ul><li> successivo (saltando i nodi di testo)
-ul = h.find_next_sibling("ul")
-if ul:
-    li = ul.find("li")
-    if li:
-        cfr_text = _clean(li.get_text(" ", strip=True))
-else:
-    # fallback: cerca il primo ul dopo l'heading (in caso di markup diverso)
-    ul2 = h.find_next("ul")
-    if ul2:
-        li2 = ul2.find("li")
-        if li2:
-            cfr_text = _clean(li2.get_text(" ", strip=True))
-
-            # se non è una riga "Cfr." (es. "Canto di Natale") lasciamo refs vuoti
-            refs = []
-            if cfr_text.lower().startswith("cfr"):
-                # può contenere più riferimenti separati da ; oppure virgole
-                # prendiamo tutto e lasciamo a parse_reference_flexible il lavoro
-                refs = parse_reference_flexible(cfr_text.replace("Cfr.", "").replace("cfr.", "").strip())
+        # riferimenti dal primo <li> della lista
+        li = el.find("li")
+        cfr_text = _clean(li.get_text(" ", strip=True)) if li else ""
 
-            songs.append(Song(title=title, url=href, refs=refs, cfr_raw=cfr_text))
+        # se non è una riga "Cfr." (es. "Canto di Natale") lasciamo refs vuoti
+        refs = ()
+        if cfr_text.lower().startswith("cfr"):
+            # può contenere più riferimenti separati da ; oppure virgole
+            # prendiamo tutto e lasciamo a parse_reference_flexible il lavoro
+            refs = parse_reference_flexible(cfr_text.replace("Cfr.", "").replace("cfr.", "").strip())
 
-        # trova link "Successivo >>"
-        next_link = None
-        for a in soup.find_all("a", href=True):
-            if "Successivo" in a.get_text():
-                next_link = a["href"]
+        for title, href in pending:
+            songs.append(Song(title=title, url=href, refs=refs, cfr_raw=cfr_text))
+        pending = []
+
+    # titoli senza alcun <ul> dopo di loro
+    for title, href in pending:
+        songs.append(Song(title=title, url=href, refs=(), cfr_raw=""))
+    return songs
+
+def _next_page_url(soup: BeautifulSoup) -> Optional[str]:
+    # trova link "Successivo >>": prima i marcatori della paginazione (WordPress)
+    a = soup.select_one('a.next[href], a[rel~="next"][href]')
+    if a is None:
+        # altrimenti per testo, dal fondo della pagina dove sta la paginazione
+        for link in reversed(soup.find_all("a", href=True)):
+            if "Successivo" in link.get_text():
+                a = link
+                break
+        else:
+            return None
+    href = a["href"]
+    return href if href.startswith("http") else BASE + href
+
+def _last_page_number(soup: BeautifulSoup) -> Optional[int]:
+    """Numero dell'ultima pagina, dedotto dai link di paginazione (/lista-canti/page/N/)."""
+    links = soup.select("a.page-numbers[href]") or soup.find_all("a", href=True)
+    last = None
+    for a in links:
+        m = _RE_PAGE_NUM.search(a["href"])
+        if m:
+            n = int(m.group(1))
+            last = n if last is None else max(last, n)
+    return last
+
+def _scrape_lista_canti(max_pages: int, polite_sleep: float, max_workers: int) -> List[Song]:
+    """
+    Scarica /lista-canti/ e tutte le pagine successive.
+    Dalla prima pagina ricava il numero di pagine (/lista-canti/page/N/) e scarica
+    le altre in parallelo; se la numerazione non c'è, segue i link "Successivo".
+    polite_sleep è l'intervallo medio tra due richieste (0 = nessun limite).
+    Estrae:
+      - titolo canto
+      - URL canto
+      - righe "Cfr. ..." (se presenti)
+    """
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0 (compatible; AuditBot/1.0; +https://example.invalid)"})
+    # Accept-Encoding resta quello di requests: gzip, deflate e br (con brotli installato),
+    # cioè solo le codifiche che urllib3 sa decomprimere
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    bucket = _TokenBucket(1 / polite_sleep, max_workers) if polite_sleep > 0 else None
+
+    def get(url: str) -> requests.Response:
+        if bucket:
+            bucket.acquire()
+        r = session.get(url, timeout=30)
+        r.raise_for_status()
+        return r
+
+    seen: Set[Tuple[str, str]] = set()
+    soup = _make_soup(get(START_URL))
+    songs: List[Song] = _parse_lista_page(soup, seen)
+
+    last = _last_page_number(soup)
+    if last:
+        urls = [f"{BASE}/lista-canti/page/{i}/" for i in range(2, min(last, max_pages) + 1)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # map restituisce le risposte in ordine di pagina, man mano che arrivano
+            for r in pool.map(get, urls):
+                songs.extend(_parse_lista_page(_make_soup(r), seen))
+    else:
+        # numerazione non trovata: una pagina alla volta seguendo "Successivo"
+        url = _next_page_url(soup)
+        for _ in range(max_pages - 1):
+            if not url:
                 break
-        if not next_link:
-            break
-        url = next_link if next_link.startswith("http") else BASE + next_link
-        time.sleep(polite_sleep)
-
-    # dedup per titolo+url
-    uniq = {}
-    for s in songs:
-        key = (s.title.lower(), s.url)
-        if key not in uniq:
-            uniq[key] = s
-    return list(uniq.values())
+            soup = _make_soup(get(url))
+            songs.extend(_parse_lista_page(soup, seen))
+            url = _next_page_url(soup)
+    return songs
+
+def _load_cached_songs() -> Optional[Tuple[float, List[Song]]]:
+    """(istante dello scraping, canti) salvati su disco, se più recenti di CACHE_TTL secondi."""
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            fmt, scraped_at, songs = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, TypeError, ValueError):
+        # file assente, illeggibile o di un formato vecchio: si riscarica
+        return None
+    if fmt != _CACHE_FORMAT or time.time() - scraped_at > CACHE_TTL:
+        return None
+    return scraped_at, songs
+
+def _save_cached_songs(scraped_at: float, songs: List[Song]) -> None:
+    """Scrive l'indice su disco in modo atomico (file temporaneo + os.replace)."""
+    cache_dir = os.path.dirname(CACHE_PATH)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except OSError:
+        return  # disco non scrivibile: resta solo la cache in memoria
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((_CACHE_FORMAT, scraped_at, songs), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CACHE_PATH)
+    except (OSError, pickle.PicklingError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+@st.cache_resource(show_spinner=False)
+def fetch_all_songs_from_lista_canti(
+    max_pages: int = 80, polite_sleep: float = 0.25, max_workers: int = 8
+) -> Tuple[float, List[Song]]:
+    """
+    (istante dello scraping, canti). st.cache_resource lo tiene in memoria nel
+    processo (lo stesso oggetto per tutte le sessioni, senza copie: la lista e i
+    Song non vanno modificati); CACHE_PATH lo conserva su disco, così dopo un
+    riavvio non serve riscaricare il sito. Lo scraping riparte solo se il file
+    manca o è più vecchio di CACHE_TTL; la scadenza in memoria la gestisce get_index.
+    """
+    cached = _load_cached_songs()
+    if cached is not None:
+        return cached
+    scraped_at = time.time()
+    songs = _scrape_lista_canti(max_pages, polite_sleep, max_workers)
+    _save_cached_songs(scraped_at, songs)
+    return scraped_at, songs
+
+@st.cache_resource(show_spinner=False)
+def _load_index() -> Tuple[float, SongIndex, List[Song]]:
+    """(istante dello scraping, indice, canti); la scadenza la controlla get_index."""
+    scraped_at, songs = fetch_all_songs_from_lista_canti()
+    return scraped_at, build_index(songs), songs
+
+def get_index() -> Tuple[SongIndex, List[Song]]:
+    """
+    Indice e canti, un'unica copia in memoria condivisa da tutte le sessioni.
+    L'età si misura dallo scraping, non da quando la copia è entrata in memoria:
+    un file su disco di quasi CACHE_TTL secondi non deve restare altre CACHE_TTL.
+    """
+    scraped_at, index, songs = _load_index()
+    if time.time() - scraped_at > CACHE_TTL:
+        fetch_all_songs_from_lista_canti.clear()
+        _load_index.clear()
+        scraped_at, index, songs = _load_index()
+    return index, songs
 
 # ----------------------------
 # UI
@@ -342,7 +600,7 @@ with st.expander("Come funziona"):
         "e calcola un punteggio di aderenza per ogni lettura inserita."
     )
 
-songs = fetch_all_songs_from_lista_canti()
+index, songs = get_index()
 
 col1, col2 = st.columns([2, 1])
 
@@ -363,22 +621,21 @@ if st.button("Trova canti", type="primary"):
         st.warning("Inserisci almeno una lettura.")
         st.stop()
 
-    for line in lines:
-        refs = parse_reference_flexible(line)
+    all_refs = [parse_reference_flexible(line) for line in lines]
+    all_scores = score_songs_for_readings(all_refs, index)
+
+    for line, refs, scores in zip(lines, all_refs, all_scores):
         st.subheader(line)
 
         if not refs:
             st.info("Non riesco a interpretare il riferimento. Prova con una forma tipo: 'Is 30,15-16' o 'Isaia capitolo 30 vv 15-16'.")
             continue
 
-        scored = []
-        for s in songs:
-            sc = score_song_for_reading(refs, s)
-            if sc >= min_score:
-                scored.append((sc, s))
-        scored.sort(key=lambda x: x[0], reverse=True)
-
-        top = scored[:3]
+        top = [
+            (scores[i], songs[i])
+            for i in np.argsort(-scores, kind="stable")[:3]
+            if scores[i] > 0 and scores[i] >= min_score
+        ]
         if not top:
             st.write("Nessun canto sopra soglia. Abbassa la soglia oppure prova una forma più canonica del riferimento.")
             continue